@@ -5,9 +5,16 @@ Supports anonymous and authenticated uploads with multipart support.
 """
 
 import argparse
+import io
 import json
+import logging
+import logging.handlers
+import mmap
 import os
+import queue
+import socket
 import sys
+import tempfile
 import time
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -16,36 +23,227 @@ from base64 import b64encode
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from tqdm import tqdm
-tqdm.set_lock(threading.RLock())
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger('zerofs')
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """Route log records through a queue drained by a background thread.
+
+    Workers only enqueue records, so a slow terminal never blocks the upload
+    threads the way direct print() calls (which serialize on the stdout
+    lock) can under failure storms.
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    return listener
 
 
 # Constants
 MAX_RETRIES = 5
-RETRY_BACKOFF_BASE = 2
+RETRY_BACKOFF_CAP = 30
+# Below this size the multipart machinery is pure overhead; hint the server
+# to hand back a single presigned PUT instead.
+SINGLE_UPLOAD_THRESHOLD = 16 * 1024 * 1024
+# Below this size, skip the progress display entirely.
+PROGRESS_MIN_SIZE = 1024 * 1024
+# Content types worth zstd-compressing before upload (plus any text/*).
+COMPRESSIBLE_CONTENT_TYPES = {
+    'application/json',
+    'application/xml',
+    'application/x-ndjson',
+}
+
+
+def compress_file(file_path: str, content_type: str, mode: str):
+    """Optionally zstd-compress the file before upload.
+
+    Returns (path, content_encoding): the path of a compressed temp file and
+    'zstd' when compression applies, or the original path and '' when it
+    doesn't. The caller owns (and must delete) the temp file.
+    """
+    if mode == 'none':
+        return file_path, ''
+
+    if zstandard is None:
+        if mode == 'zstd':
+            raise RuntimeError(
+                '--compress zstd requires the zstandard package '
+                '(pip install zstandard)')
+        return file_path, ''
+
+    if mode == 'auto':
+        compressible = (content_type in COMPRESSIBLE_CONTENT_TYPES
+                        or content_type.startswith('text/'))
+        if not compressible:
+            return file_path, ''
+
+    tmp = tempfile.NamedTemporaryFile(suffix='.zst', delete=False)
+    try:
+        with open(file_path, 'rb') as src, tmp:
+            zstandard.ZstdCompressor(level=3).copy_stream(src, tmp)
+    except Exception:
+        os.unlink(tmp.name)
+        raise
+    return tmp.name, 'zstd'
+
+
+def warm_file_cache(file_path: str, file_size: int):
+    """Ask the kernel to start prefetching the file into the page cache.
+
+    Run on a background thread while the initiate-upload round trip is in
+    flight, so the first parts are already in RAM when uploading starts.
+    Best-effort: a no-op where posix_fadvise isn't available.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, file_size, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+class _FileSlice(io.RawIOBase):
+    """Read-only view of a byte range of an open file.
+
+    Lets a part upload stream straight from disk instead of buffering the
+    whole part in memory. Disk reads use os.pread where available, so every
+    buffer fill is one positioned syscall instead of a seek-then-read pair
+    and seeking within the slice costs nothing. Disk reads are done in at
+    least ``_DISK_READ_SIZE`` chunks so small reads from the HTTP layer
+    (typically 8 KiB) don't translate into one syscall each.
+    """
+
+    # Minimum bytes fetched from disk per read() call.
+    _DISK_READ_SIZE = 131072
+
+    _HAS_PREAD = hasattr(os, 'pread')
+
+    def __init__(self, fileobj, start: int, length: int):
+        self._file = fileobj
+        self._fd = fileobj.fileno() if self._HAS_PREAD else None
+        self._start = start
+        self._length = length
+        self._pos = 0
+        self._buffer = b''
+
+    def __len__(self):
+        return self._length
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        remaining = self._length - self._pos
+        if remaining <= 0:
+            return b''
+        if size < 0 or size > remaining:
+            size = remaining
+        while len(self._buffer) < size:
+            disk_offset = self._pos + len(self._buffer)
+            want = min(self._length - disk_offset,
+                       max(size - len(self._buffer), self._DISK_READ_SIZE))
+            if want <= 0:
+                break
+            chunk = self._read_at(disk_offset, want)
+            if not chunk:
+                break
+            self._buffer += chunk
+        data = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        self._pos += len(data)
+        return data
+
+    def _read_at(self, offset: int, size: int) -> bytes:
+        if self._HAS_PREAD:
+            return os.pread(self._fd, size, self._start + offset)
+        self._file.seek(self._start + offset)
+        return self._file.read(size)
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        """Seek within the slice; lets urllib3 rewind the body on retry."""
+        if whence == io.SEEK_SET:
+            target = pos
+        elif whence == io.SEEK_CUR:
+            target = self._pos + pos
+        else:
+            target = self._length + pos
+        self._pos = max(0, min(target, self._length))
+        self._buffer = b''
+        return self._pos
 
 
 class ProgressTracker:
-    """Tracks and displays upload progress in real-time."""
+    """Tracks and displays upload progress in real-time.
 
-    def __init__(self, total_size: int):
+    Workers only bump a counter under a plain lock; a daemon thread renders
+    the status line at 10 Hz, so formatting and terminal writes stay off the
+    upload hot path no matter how often update() is called.
+    """
+
+    _PRINT_INTERVAL = 0.1
+
+    def __init__(self, total_size: int, enabled: bool = True):
         self.total_size = total_size
-        self.pbar = tqdm(
-            total=total_size,
-            unit='B',
-            unit_scale=True,
-            unit_divisor=1024,
-            desc="Uploading",
-            ncols=100
-        )
+        self.enabled = enabled
+        self._done = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._started = time.monotonic()
+        if enabled:
+            self._printer = threading.Thread(
+                target=self._print_loop, daemon=True)
+            self._printer.start()
 
     def update(self, bytes_uploaded: int):
         """Update progress with newly uploaded bytes."""
-        self.pbar.update(bytes_uploaded)
+        with self._lock:
+            self._done += bytes_uploaded
 
     def complete(self):
         """Mark progress as complete."""
-        self.pbar.close()
+        if not self.enabled or self._stop.is_set():
+            return
+        self._stop.set()
+        self._printer.join()
+        self._render()
+        sys.stdout.write('\n')
+        sys.stdout.flush()
+
+    def _print_loop(self):
+        while not self._stop.wait(self._PRINT_INTERVAL):
+            self._render()
+
+    def _render(self):
+        done = self._done
+        elapsed = time.monotonic() - self._started
+        rate = done / elapsed if elapsed > 0 else 0
+        percent = done / self.total_size * 100 if self.total_size else 100
+        sys.stdout.write(
+            f'\rUploading: {percent:5.1f}% | '
+            f'{done / (1024**2):.1f}/{self.total_size / (1024**2):.1f} MB | '
+            f'{rate / (1024**2):.1f} MB/s')
+        sys.stdout.flush()
 
 
 class ClientAuth:
@@ -81,21 +279,34 @@ class APIClient:
         self.session = self._create_session()
 
     def _create_session(self):
-        """Create requests session with retry logic."""
+        """Create requests session with retry logic.
+
+        initiate/complete/abort all hit the same API host, so the session
+        keeps a few connections alive across calls and the whole upload pays
+        for one TLS handshake and DNS lookup instead of one per call.
+        """
         session = requests.Session()
         retry_strategy = Retry(
             total=3,
             backoff_factor=1,
+            backoff_jitter=0.5,
             status_forcelist=[429, 500, 502, 503, 504]
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=4,
+            max_retries=retry_strategy
+        )
         session.mount("http://", adapter)
         session.mount("https://", adapter)
+        session.headers['Connection'] = 'keep-alive'
         return session
 
     def initiate_upload(self, filename: str, file_size: int, bucket_code: str,
                         content_type: str = 'application/octet-stream',
-                        note: str = '', token: Optional[str] = None) -> Dict[str, Any]:
+                        note: str = '', token: Optional[str] = None,
+                        prefer_single: bool = False,
+                        content_encoding: str = '') -> Dict[str, Any]:
         """
         Initiate upload and get presigned URLs from API server.
         Server manages SSE-C encryption and returns presigned URLs.
@@ -106,7 +317,9 @@ class APIClient:
             'bucket_code': bucket_code,
             'content_type': content_type,
             'note': note,
-            'token': token
+            'token': token,
+            'prefer_single': prefer_single,
+            'content_encoding': content_encoding
         }
 
         try:
@@ -182,13 +395,43 @@ class APIClient:
 class Uploader:
     """Handles file uploads directly to storage using presigned URLs."""
 
-    def __init__(self, api_client: APIClient):
+    def __init__(self, api_client: APIClient, workers: Optional[int] = None):
         self.api_client = api_client
+        self.workers = workers or min(8, (os.cpu_count() or 4) * 2)
         self.session = self._create_session()
 
     def _create_session(self):
-        """Create requests session for storage uploads."""
+        """Create requests session for storage uploads.
+
+        Uploads from all worker threads go to the same storage host, so the
+        connection pool is sized well above the worker count to keep
+        connections (and their TLS handshakes) reused across parts. Part
+        retries are handled by the adapter's Retry, which applies jittered
+        backoff and honors Retry-After from the storage server.
+        """
         session = requests.Session()
+        retry_strategy = Retry(
+            total=MAX_RETRIES,
+            backoff_factor=1,
+            backoff_jitter=0.5,
+            backoff_max=RETRY_BACKOFF_CAP,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['PUT'],
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=32,
+            max_retries=retry_strategy
+        )
+        # Part bodies are written in large chunks, so disable Nagle to avoid
+        # the kernel delaying the final partial segment of each write.
+        adapter.poolmanager.connection_pool_kw['socket_options'] = [
+            (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        ]
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers['Connection'] = 'keep-alive'
         return session
 
     def upload_file(self, file_path: str, upload_metadata: Dict[str, Any],
@@ -209,9 +452,10 @@ class Uploader:
     def _single_upload(self, file_path: str, metadata: Dict[str, Any],
                        token: Optional[str] = None) -> bool:
         """Perform single file upload directly to storage."""
-        print(f'Starting single upload for {os.path.basename(file_path)}...')
+        logger.info(f'Starting single upload for {os.path.basename(file_path)}...')
         file_size = os.path.getsize(file_path)
-        progress = ProgressTracker(file_size)
+        progress = ProgressTracker(
+            file_size, enabled=file_size >= PROGRESS_MIN_SIZE)
 
         try:
             url = metadata['url']
@@ -227,7 +471,7 @@ class Uploader:
                 response.raise_for_status()
 
             progress.complete()
-            print('Upload to storage completed successfully!')
+            logger.info('Upload to storage completed successfully!')
 
             result = self.api_client.complete_single_upload(
                 metadata['completion_token'],
@@ -236,14 +480,14 @@ class Uploader:
 
             metadata['file_id'] = result.get('file_id')
 
-            print('Upload finalized.')
+            logger.info('Upload finalized.')
             return True
 
         except Exception as e:
             progress.complete()
-            print(f'\nUpload failed: {e}')
+            logger.error(f'\nUpload failed: {e}')
             if hasattr(e, 'response') and e.response is not None:
-                print(f'Response: {e.response.status_code} {e.response.text}')
+                logger.error(f'Response: {e.response.status_code} {e.response.text}')
             return False
 
     def _multipart_upload(self, file_path: str, metadata: Dict[str, Any],
@@ -254,74 +498,36 @@ class Uploader:
         part_urls = metadata['part_urls']
         completion_token = metadata['completion_token']
 
-        print(
+        logger.info(
             f'Starting multipart upload for {os.path.basename(file_path)}...')
-        print(f'File size: {file_size / (1024**3):.2f} GB | '
+        logger.info(f'File size: {file_size / (1024**3):.2f} GB | '
               f'Chunk size: {chunk_size / (1024**2):.0f} MB | '
               f'Parts: {len(part_urls)}')
 
         progress = ProgressTracker(file_size)
 
         try:
-
-            parts = []
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                futures = {}
-
-                sse_c_headers = {
-                    'x-amz-server-side-encryption-customer-algorithm': 'AES256',
-                    'x-amz-server-side-encryption-customer-key': metadata.get('ssec_key'),
-                    'x-amz-server-side-encryption-customer-key-md5': metadata.get('ssec_key_md5'),
-                }
-
-                for part_info in part_urls:
-                    part_number = part_info['part_number']
-                    part_url = part_info['url']
-
-                    start = (part_number - 1) * chunk_size
-                    end = min(start + chunk_size, file_size)
-
-                    future = executor.submit(
-                        self._upload_part,
-                        file_path, part_url, part_number, start, end, progress, sse_c_headers
-                    )
-                    futures[future] = part_number
-
-                for future in as_completed(futures):
-                    part_number = futures[future]
-                    try:
-                        part_info = future.result()
-                        parts.append(part_info)
-                    except Exception as e:
-                        print(f'\nPart {part_number} failed: {e}')
-                        progress.complete()
-
-                        self.api_client.abort_multipart_upload(
-                            completion_token,
-                            token
-                        )
-                        return False
-
-            parts.sort(key=lambda x: x['part_number'])
-
-            progress.complete()
-            print('All parts uploaded to storage successfully!')
-
-            print('Finalizing multipart upload with API server...')
-            result = self.api_client.complete_multipart_upload(
-                completion_token,
-                parts,
-                token
-            )
-
-            metadata['file_id'] = result.get('file_id')
-
-            print('Multipart upload completed successfully!')
-            return True
+            with open(file_path, 'rb') as f:
+                # Map the file once and hand workers zero-copy views; if the
+                # platform or filesystem can't map it, workers stream their
+                # ranges from disk instead.
+                mm = None
+                try:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    pass
+
+                try:
+                    source = mm if mm is not None else file_path
+                    return self._upload_parts(
+                        source, file_path, metadata, progress, token)
+                finally:
+                    if mm is not None:
+                        mm.close()
 
         except (Exception, KeyboardInterrupt) as e:
             progress.complete()
-            print(f'\nMultipart upload failed: {e}')
+            logger.error(f'\nMultipart upload failed: {e}')
             try:
                 self.api_client.abort_multipart_upload(
                     completion_token,
@@ -330,50 +536,143 @@ class Uploader:
                 pass
             return False
 
-    def _upload_part(self, file_path: str, part_url: str, part_number: int,
+    def _upload_parts(self, source, file_path: str, metadata: Dict[str, Any],
+                      progress: ProgressTracker, token: Optional[str] = None) -> bool:
+        """Upload all parts from source (an mmap or a file path) and finalize."""
+        file_size = os.path.getsize(file_path)
+        chunk_size = metadata['chunk_size']
+        part_urls = metadata['part_urls']
+        completion_token = metadata['completion_token']
+
+        # Part numbers are dense 1..N, so completed parts are written straight
+        # to their slot; the list is already ordered when the upload finishes.
+        parts = [None] * len(part_urls)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {}
+
+            # Bound in-flight parts so slow workers apply backpressure to
+            # the submit loop instead of queueing every part up front.
+            semaphore = threading.Semaphore(self.workers)
+
+            sse_c_headers = {
+                'x-amz-server-side-encryption-customer-algorithm': 'AES256',
+                'x-amz-server-side-encryption-customer-key': metadata.get('ssec_key'),
+                'x-amz-server-side-encryption-customer-key-md5': metadata.get('ssec_key_md5'),
+            }
+
+            # Precompute the full (part_number, start, end, url) table in one
+            # pass, ordered by part number so submission walks the file
+            # sequentially.
+            ranges = sorted(
+                (p['part_number'],
+                 (p['part_number'] - 1) * chunk_size,
+                 min(p['part_number'] * chunk_size, file_size),
+                 p['url'])
+                for p in part_urls
+            )
+
+            for part_number, start, end, part_url in ranges:
+                semaphore.acquire()
+                future = executor.submit(
+                    self._upload_part_bounded,
+                    semaphore, source, part_url, part_number, start, end,
+                    progress, sse_c_headers
+                )
+                futures[future] = part_number
+
+            for future in as_completed(futures):
+                part_number = futures[future]
+                try:
+                    parts[part_number - 1] = future.result()
+                except Exception as e:
+                    logger.error(f'\nPart {part_number} failed: {e}')
+                    progress.complete()
+
+                    self.api_client.abort_multipart_upload(
+                        completion_token,
+                        token
+                    )
+                    return False
+
+        progress.complete()
+        logger.info('All parts uploaded to storage successfully!')
+
+        logger.info('Finalizing multipart upload with API server...')
+        result = self.api_client.complete_multipart_upload(
+            completion_token,
+            parts,
+            token
+        )
+
+        metadata['file_id'] = result.get('file_id')
+
+        logger.info('Multipart upload completed successfully!')
+        return True
+
+    def _upload_part_bounded(self, semaphore: threading.Semaphore, *args) -> Dict[str, Any]:
+        """Run _upload_part and release its in-flight slot when done."""
+        try:
+            return self._upload_part(*args)
+        finally:
+            semaphore.release()
+
+    def _upload_part(self, source, part_url: str, part_number: int,
                      start: int, end: int, progress: ProgressTracker,
                      sse_headers: Dict[str, str]) -> Dict[str, Any]:
-        """Upload a single part with required SSE-C headers."""
+        """Upload a single part with required SSE-C headers.
+
+        source is either the mmap of the whole file (parts are sent as
+        zero-copy views) or the file path (parts stream from disk).
+        """
         part_size = end - start
 
-        for attempt in range(MAX_RETRIES):
-            try:
-                with open(file_path, 'rb') as f:
-                    f.seek(start)
-                    data = f.read(part_size)
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                return self._put_part(
+                    _FileSlice(f, start, part_size),
+                    part_url, part_number, part_size, progress, sse_headers)
 
-                headers = {
-                    'Content-Length': str(part_size),
-                    **sse_headers
-                }
+        view = memoryview(source)[start:end]
+        try:
+            return self._put_part(
+                view, part_url, part_number, part_size, progress, sse_headers)
+        finally:
+            view.release()
+
+    def _put_part(self, body, part_url: str, part_number: int,
+                  part_size: int, progress: ProgressTracker,
+                  sse_headers: Dict[str, str]) -> Dict[str, Any]:
+        """PUT one part; retries and backoff are handled by the session adapter."""
+        headers = sse_headers.copy()
+        headers['Content-Length'] = str(part_size)
 
-                response = self.session.put(
-                    part_url,
-                    data=data,
-                    headers=headers,
-                    timeout=3600
-                )
+        try:
+            # Close the response as soon as the ETag is read so the
+            # connection returns to the pool for the next part immediately.
+            with self.session.put(
+                part_url,
+                data=body,
+                headers=headers,
+                timeout=3600
+            ) as response:
                 response.raise_for_status()
+                etag = response.headers.get('ETag', '')
+        except requests.RequestException as e:
+            logger.error(
+                f"Part {part_number} failed after {MAX_RETRIES} attempts: {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                logger.error(
+                    f"Response: {e.response.status_code} {e.response.text}")
+            raise
 
-                etag = response.headers.get('ETag', '').strip('"')
-                progress.update(part_size)
-
-                return {
-                    'part_number': part_number,
-                    'etag': etag
-                }
+        if etag[:1] == '"':
+            etag = etag[1:-1]
+        progress.update(part_size)
 
-            except requests.RequestException as e:
-                if attempt < MAX_RETRIES - 1:
-                    wait_time = RETRY_BACKOFF_BASE ** attempt
-                    time.sleep(wait_time)
-                    continue
-                print(
-                    f"Part {part_number} failed after {MAX_RETRIES} attempts: {e}")
-                if hasattr(e, 'response') and e.response is not None:
-                    print(
-                        f"Response: {e.response.status_code} {e.response.text}")
-                raise
+        return {
+            'part_number': part_number,
+            'etag': etag
+        }
 
 
 def main():
@@ -406,6 +705,14 @@ Examples:
                                help='Optional note/description for the file')
     upload_parser.add_argument('--content-type', default='application/octet-stream',
                                help='Content type (default: application/octet-stream)')
+    upload_parser.add_argument('--compress', choices=['auto', 'zstd', 'none'],
+                               default='none',
+                               help='zstd-compress before upload; auto compresses '
+                                    'only text-like content types (requires the '
+                                    'zstandard package)')
+    upload_parser.add_argument('--workers', type=int, default=None,
+                               help='Concurrent upload workers for multipart uploads '
+                                    '(default: min(8, 2x CPU cores))')
     upload_parser.add_argument('--token', help='Authentication token')
     upload_parser.add_argument('--token-file', default='auth.json',
                                help='Path to token file (default: auth.json)')
@@ -416,6 +723,16 @@ Examples:
         parser.print_help()
         return 1
 
+    listener = setup_logging()
+    try:
+        return _run(args)
+    finally:
+        listener.stop()
+
+
+def _run(args) -> int:
+    """Dispatch the parsed command."""
+
     if args.command == 'upload':
         # Validate file exists
         if not os.path.exists(args.file):
@@ -432,45 +749,73 @@ Examples:
         print(f'API Server: {args.api_url}')
         print()
 
-        # Load authentication
-        auth = ClientAuth(token=args.token, token_file=args.token_file)
-        token = auth.get_token()
+        # Optionally pre-compress; upload_path is a temp file when it applies
+        try:
+            upload_path, content_encoding = compress_file(
+                file_path, args.content_type, args.compress)
+        except RuntimeError as e:
+            print(f'Error: {e}')
+            return 1
 
-        if not token:
-            print('Warning: No authentication token provided. Upload will be anonymous.')
+        if content_encoding:
+            file_size = os.path.getsize(upload_path)
+            print(
+                f'Compressed with zstd: {file_size / (1024**2):.2f} MB to upload')
             print()
 
-        # Initialize API client (communicates with API)
-        api_client = APIClient(api_base_url=args.api_url)
+        try:
+            # Load authentication
+            auth = ClientAuth(token=args.token, token_file=args.token_file)
+            token = auth.get_token()
 
-        print('Requesting presigned URLs from API server...')
+            if not token:
+                print('Warning: No authentication token provided. Upload will be anonymous.')
+                print()
 
-        try:
-            metadata = api_client.initiate_upload(
-                filename=filename,
-                file_size=file_size,
-                bucket_code=args.bucket_code,
-                content_type=args.content_type,
-                note=b64encode(str(args.note).encode()).decode(),
-                token=token
-            )
-        except RuntimeError as e:
-            print(f'Error: {e}')
-            return 1
+            # Initialize API client (communicates with API)
+            api_client = APIClient(api_base_url=args.api_url)
 
-        print(f'Upload type: {metadata.get("upload_type")}')
-        print()
+            print('Requesting presigned URLs from API server...')
 
-        uploader = Uploader(api_client)
+            # Overlap disk prefetch with the initiate round trip
+            threading.Thread(
+                target=warm_file_cache,
+                args=(upload_path, file_size),
+                daemon=True
+            ).start()
 
-        try:
-            success = uploader.upload_file(file_path, metadata, token)
-        except Exception as e:
-            print(f'Error: {e}')
-            return 1
+            try:
+                metadata = api_client.initiate_upload(
+                    filename=filename,
+                    file_size=file_size,
+                    bucket_code=args.bucket_code,
+                    content_type=args.content_type,
+                    note=b64encode(str(args.note).encode()).decode() if args.note else '',
+                    token=token,
+                    prefer_single=file_size < SINGLE_UPLOAD_THRESHOLD,
+                    content_encoding=content_encoding
+                )
+            except RuntimeError as e:
+                print(f'Error: {e}')
+                return 1
 
-        if not success:
-            return 1
+            print(f'Upload type: {metadata.get("upload_type")}')
+            print()
+
+            uploader = Uploader(api_client, workers=args.workers)
+
+            try:
+                success = uploader.upload_file(upload_path, metadata, token)
+            except Exception as e:
+                print(f'Error: {e}')
+                return 1
+
+            if not success:
+                return 1
+
+        finally:
+            if upload_path != file_path:
+                os.unlink(upload_path)
 
         # Display results
         print(f'\n✓ Upload successful!')